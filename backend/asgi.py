@@ -0,0 +1,17 @@
+"""
+ASGI config for PC Maintenance Management System
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+# Use deployment settings on Render even if only the generic RENDER env is available.
+is_render = 'RENDER' in os.environ or 'RENDER_EXTERNAL_HOSTNAME' in os.environ
+setting_module = 'backend.deployment_settings' if is_render else 'backend.settings'
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', setting_module)
+# Under ASGI each request runs in its own context, so persistent DB connections are never
+# reused and would only pile up; connect per request (DATABASE_URL is the Neon pooler).
+os.environ.setdefault('CONN_MAX_AGE', '0')
+
+application = get_asgi_application()
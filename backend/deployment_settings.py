@@ -53,13 +53,16 @@ if not SECRET_KEY:
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
+    "core.middleware.LoadSheddingMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.profiling.ProfilingMiddleware",
 ]
 
 # ==================================================
@@ -166,8 +169,25 @@ LOGGING = {
 DATABASES = {
     "default": dj_database_url.config(
         default=DATABASE_URL,
-        conn_max_age=600,
+        conn_max_age=CONN_MAX_AGE,
         ssl_require=True,
     )
 }
 
+DATABASE_REPLICA_URL = os.environ.get("DATABASE_REPLICA_URL", "")
+if DATABASE_REPLICA_URL:
+    DATABASES["replica"] = dj_database_url.parse(
+        DATABASE_REPLICA_URL,
+        conn_max_age=CONN_MAX_AGE,
+        ssl_require=True,
+    )
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+
+BOOKING_EVENTS_LISTEN_URL = os.environ.get("BOOKING_EVENTS_LISTEN_URL", "")
+if BOOKING_EVENTS_LISTEN_URL:
+    DATABASES["booking_events"] = dj_database_url.parse(
+        BOOKING_EVENTS_LISTEN_URL,
+        conn_max_age=0,
+        ssl_require=True,
+    )
+    DATABASES["booking_events"]["TEST"] = {"MIRROR": "default"}
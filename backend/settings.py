@@ -7,6 +7,7 @@ from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 
 # Load environment variables
 load_dotenv()
@@ -42,13 +43,16 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'core.middleware.LoadSheddingMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -123,17 +127,41 @@ FALLBACK_DATABASE_URL = (
     'neondb?sslmode=require&channel_binding=require'
 )
 database_url = os.environ.get('DATABASE_URL', FALLBACK_DATABASE_URL)
+# Seconds to keep DB connections open between requests; backend/asgi.py defaults it to 0
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', 600))
 if database_url:
     DATABASES = {
         'default': dj_database_url.parse(
             database_url,
-            conn_max_age=600,
+            conn_max_age=CONN_MAX_AGE,
             ssl_require=not DEBUG,
         )
     }
 elif not DEBUG:
     raise ValueError('DATABASE_URL is required when DEBUG=False')
 
+# Optional read replica; safe requests read from it via core.db_router.PrimaryReplicaRouter
+database_replica_url = os.environ.get('DATABASE_REPLICA_URL')
+if database_replica_url:
+    DATABASES['replica'] = dj_database_url.parse(
+        database_replica_url,
+        conn_max_age=CONN_MAX_AGE,
+        ssl_require=not DEBUG,
+    )
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+# Optional direct (non-pooled) connection for the booking events LISTEN thread; see core.events
+booking_events_listen_url = os.environ.get('BOOKING_EVENTS_LISTEN_URL')
+if booking_events_listen_url:
+    DATABASES['booking_events'] = dj_database_url.parse(
+        booking_events_listen_url,
+        conn_max_age=0,
+        ssl_require=not DEBUG,
+    )
+    DATABASES['booking_events']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# Seconds a client keeps reading from the primary after it writes
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
@@ -141,8 +169,12 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Admin changelists use PostgreSQL's row estimate instead of COUNT(*) above this size
+ESTIMATED_COUNT_THRESHOLD = int(os.environ.get('ESTIMATED_COUNT_THRESHOLD', 10000))
+
 # Custom User Model
 AUTH_USER_MODEL = 'core.User'
+AUTHENTICATION_BACKENDS = ['core.backends.UsernameOrEmailBackend']
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -163,6 +195,87 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Cache shared by all workers. Without it every process keeps its own LocMemCache, so revenue
+# bucket invalidation and read-replica pins only reach the worker that made the change
+# (`manage.py check --deploy` warns about this).
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Closed revenue report buckets are cached for this many seconds. Booking changes drop the
+# buckets they touch; the timeout bounds changes made around the ORM signals and, without a
+# shared cache, how long other workers can serve a dropped bucket.
+REVENUE_REPORT_CACHE_TIMEOUT = 60 * 60 * 24 if REDIS_URL else 300
+
+# Booking delta-sync tokens (and the tombstones behind them) stay valid this long
+SYNC_TOMBSTONE_RETENTION = timedelta(days=30)
+# Changes younger than this are held back from sync polls until any transaction writing an
+# older timestamp has committed; keep it above the longest booking write transaction
+SYNC_SAFETY_WINDOW = timedelta(seconds=10)
+
+# Server-Sent Events for booking status changes
+BOOKING_EVENTS_BACKLOG = 500
+BOOKING_EVENTS_HEARTBEAT = 15
+BOOKING_EVENTS_RETRY_MS = 3000
+BOOKING_EVENTS_MAX_STREAM_SECONDS = 300
+# Fan events out across workers with PostgreSQL LISTEN/NOTIFY. LISTEN needs a session, so behind
+# a transaction pooler point BOOKING_EVENTS_LISTEN_URL at a direct connection.
+BOOKING_EVENTS_PG_NOTIFY = os.environ.get('BOOKING_EVENTS_PG_NOTIFY', 'False') == 'True'
+
+# Maximum number of sub-requests accepted by /api/batch/
+BATCH_MAX_REQUESTS = 25
+
+# Maximum number of rows accepted by one service catalog import
+SERVICE_IMPORT_MAX_ROWS = 2000
+
+# Opt-in request profiling (cProfile + SQL log) for admins sending PROFILING_HEADER
+# and for a random PROFILING_SAMPLE_RATE share of requests
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'False') == 'True'
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = 50
+
+# Per-user booking list/detail/stats cache; keys are invalidated by bumping User.bookings_version
+BOOKING_CACHE_TIMEOUT = 300
+
+# Per-process concurrency limits by endpoint class; the first matching class applies.
+# Requests wait up to 'timeout' seconds for a slot, then get 503 with Retry-After.
+# 'reports' holds the heavy admin endpoints (and batches, which can fan out to them), plus
+# admins' stats, which aggregate every booking uncached. Customer stats and dashboards are
+# cached and stay in 'reads', as do the admin site's cheap jsi18n and autocomplete lookups.
+LOAD_SHEDDING_ENABLED = os.environ.get('LOAD_SHEDDING_ENABLED', 'True') == 'True'
+LOAD_SHEDDING_CLASSES = [
+    {
+        'name': 'reports',
+        'paths': [
+            r'^/api/bookings/(admin|revenue|dispatch)/',
+            r'^/api/services/bulk-upsert/',
+            r'^/api/batch/',
+            r'^/admin/(?!jsi18n/|autocomplete/)',
+        ],
+        'admin_paths': [r'^/api/bookings/stats/'],
+        'limit': 2,
+        'timeout': 1.0,
+    },
+    {'name': 'writes', 'methods': ['POST', 'PUT', 'PATCH', 'DELETE'], 'limit': 8, 'timeout': 3.0},
+    {'name': 'reads', 'limit': 16, 'timeout': 3.0},
+]
+LOAD_SHEDDING_EXEMPT_PATHS = [r'^/api/health/', r'^/api/metrics/', r'^/api/bookings/events/', r'^/static/']
+LOAD_SHEDDING_RETRY_AFTER = 5
+
+# Idempotency-Key support for retried POST requests
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+# Seconds a duplicate request waits for the first one before answering 409
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+# A pending key older than this is reclaimed by retries; keep it above the worker timeout
+IDEMPOTENCY_PENDING_LEASE = timedelta(seconds=60)
+
 # CORS settings - Configure properly for production
 CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', '').split(',') if os.environ.get('CORS_ALLOWED_ORIGINS') else [
     'http://localhost:3000',  # Development React app
@@ -171,6 +284,8 @@ CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', '').split(',') if
     'http://127.0.0.1:8000',
 ]
 CORS_ALLOW_CREDENTIALS = True
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed', 'Retry-After']
 
 # CSRF Trusted Origins
 CSRF_TRUSTED_ORIGINS = os.environ.get('CSRF_TRUSTED_ORIGINS', '').split(',') if os.environ.get('CSRF_TRUSTED_ORIGINS') else [
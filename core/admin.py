@@ -1,15 +1,46 @@
+from django import forms
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.db import router, transaction
 
-from .models import Booking, Service, User
+from .models import Booking, Service, Technician, User
+from .pagination import EstimatedCountPaginator
+
+
+class LeanChangelistMixin:
+    """Estimated counts and column projections for changelists on large tables."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_only = ()
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if self.list_only and match and match.url_name and match.url_name.endswith('_changelist'):
+            queryset = queryset.only(*self.list_only)
+        return queryset
+
+
+class ServiceListFilter(admin.SimpleListFilter):
+    title = 'service'
+    parameter_name = 'service'
+
+    def lookups(self, request, model_admin):
+        return Service.objects.order_by('name').values_list('id', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(service_id=self.value())
+        return queryset
 
 
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LeanChangelistMixin, BaseUserAdmin):
     list_display = ('username', 'email', 'is_admin', 'is_staff', 'created_at')
     list_filter = ('is_admin', 'is_staff', 'is_superuser')
     search_fields = ('username', 'email', 'phone')
     ordering = ('-created_at',)
+    list_only = ('id', 'username', 'email', 'is_admin', 'is_staff', 'created_at')
     fieldsets = (
         (None, {'fields': ('username', 'password')}),
         ('Personal info', {'fields': ('email', 'first_name', 'last_name', 'phone', 'address')}),
@@ -36,21 +67,107 @@ class ServiceAdmin(admin.ModelAdmin):
     readonly_fields = ('created_at', 'updated_at')
 
 
+@admin.register(Technician)
+class TechnicianAdmin(admin.ModelAdmin):
+    list_display = ('name', 'phone', 'daily_capacity', 'areas', 'is_active')
+    list_filter = ('is_active', 'skills')
+    search_fields = ('name', 'phone', 'areas')
+    ordering = ('name',)
+    list_editable = ('daily_capacity', 'is_active')
+    filter_horizontal = ('skills',)
+    fieldsets = (
+        (None, {'fields': ('name', 'phone', 'is_active')}),
+        ('Dispatch', {'fields': ('skills', 'areas', 'daily_capacity')}),
+        ('Tarehe', {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)}),
+    )
+    readonly_fields = ('created_at', 'updated_at')
+
+
+class BookingAdminForm(forms.ModelForm):
+    """
+    Refuse status changes that Booking.TRANSITIONS does not allow, before anything is saved.
+
+    The row is locked while checking; BookingAdmin validates and saves in one transaction, so
+    the status cannot change between this check and the save.
+    """
+
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        if self.instance.pk and 'status' in self.changed_data:
+            current = (
+                Booking.objects.select_for_update()
+                .filter(pk=self.instance.pk)
+                .values_list('status', flat=True)
+                .first()
+            )
+            if status not in Booking.TRANSITIONS.get(current, ()):
+                raise forms.ValidationError(f"A booking cannot move from '{current}' to '{status}'.")
+        return status
+
+    def clean_service(self):
+        service = self.cleaned_data['service']
+        if self.instance.pk and 'service' in self.changed_data:
+            current = (
+                Booking.objects.select_for_update()
+                .filter(pk=self.instance.pk)
+                .values_list('status', flat=True)
+                .first()
+            )
+            if current not in Booking.OPEN_STATUSES:
+                raise forms.ValidationError(
+                    f"The service of a {current} booking cannot be changed; its price is recorded revenue."
+                )
+        return service
+
+
 @admin.register(Booking)
-class BookingAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user', 'service', 'preferred_date', 'status', 'payment_method', 'created_at')
-    list_filter = ('status', 'payment_method', 'created_at', 'service')
+class BookingAdmin(LeanChangelistMixin, admin.ModelAdmin):
+    form = BookingAdminForm
+    list_display = ('id', 'user', 'service', 'preferred_date', 'status', 'technician', 'payment_method', 'created_at')
+    list_filter = ('status', 'payment_method', 'created_at', ServiceListFilter)
+    list_select_related = ('user', 'service', 'technician')
+    list_only = (
+        'id', 'preferred_date', 'status', 'payment_method', 'created_at',
+        'user__id', 'user__username', 'service__id', 'service__name', 'service__price',
+        'technician__id', 'technician__name',
+    )
     search_fields = ('user__username', 'user__email', 'phone', 'address', 'problem_description')
     ordering = ('-created_at',)
     list_editable = ('status',)
+    autocomplete_fields = ('user', 'service', 'technician')
     fieldsets = (
         (None, {'fields': ('user', 'service', 'problem_description', 'preferred_date')}),
-        ('Status', {'fields': ('status',)}),
+        ('Status', {'fields': ('status', 'technician', 'price_at_booking')}),
         ('Customer Info', {'fields': ('address', 'phone', 'payment_method')}),
         ('Additional', {'fields': ('notes',)}),
         ('Tarehe', {'fields': ('created_at', 'updated_at'), 'classes': ('collapse',)}),
     )
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('price_at_booking', 'created_at', 'updated_at')
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('user', 'service')
+        return super().get_queryset(request).select_related('user', 'service', 'technician')
+
+    def changelist_view(self, request, extra_context=None):
+        # Django validates list_editable forms outside its save transaction; hold one open so
+        # the row locks taken in BookingAdminForm last until the save.
+        if request.method == 'POST':
+            with transaction.atomic(using=router.db_for_write(Booking)):
+                return super().changelist_view(request, extra_context)
+        return super().changelist_view(request, extra_context)
+
+    def get_changelist_form(self, request, **kwargs):
+        # list_editable status edits get the same transition check.
+        return super().get_changelist_form(request, form=BookingAdminForm, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        # Save only the edited columns; status goes through the conditional transition.
+        fields = [name for name in form.changed_data if name != 'status']
+        if 'status' in form.changed_data:
+            Booking.objects.filter(pk=obj.pk).transition(obj.status, rows=[(obj.pk, obj.user_id, obj.created_at)])
+        if 'service' in fields:
+            obj.price_at_booking = obj.service.price
+            fields.append('price_at_booking')
+        if fields:
+            obj.save(update_fields=[*fields, 'updated_at'])
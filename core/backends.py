@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+UserModel = get_user_model()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """Authenticate with a username or an email address, ignoring case."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if not username or password is None:
+            return None
+        user = UserModel._default_manager.with_username(username).first()
+        if user is None and '@' in username:
+            user = UserModel._default_manager.with_email(username).first()
+        if user is None:
+            # Run the password hasher once to reduce the timing difference for unknown users.
+            UserModel().set_password(password)
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,105 @@
+import asyncio
+import io
+import json
+import logging
+from urllib.parse import urlsplit
+
+from django.db import transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = '/api/'
+# Headers that belong to the batch call itself and must not leak into its sub-requests.
+EXCLUDED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_IDEMPOTENCY_KEY', 'QUERY_STRING')
+
+
+def _error(status_code, detail):
+    return {'status': status_code, 'body': {'detail': detail}}
+
+
+def _build_request(parent, method, path, query, body, headers):
+    payload = json.dumps(body).encode() if body is not None else b''
+    request = HttpRequest()
+    request.method = method
+    request.path = request.path_info = API_PREFIX + path
+    request.META = {key: value for key, value in parent.META.items() if key not in EXCLUDED_META}
+    request.META.update(
+        {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': request.path,
+            'QUERY_STRING': query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(payload)),
+        }
+    )
+    for name, value in headers.items():
+        request.META['HTTP_' + name.upper().replace('-', '_')] = value
+    request.GET = QueryDict(query)
+    request.COOKIES = parent.COOKIES
+    request._stream = io.BytesIO(payload)
+    request._read_started = False
+    return request
+
+
+def _render(response):
+    if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+        response.render()
+    body = None
+    if response.content:
+        if response.get('Content-Type', '').startswith('application/json'):
+            body = json.loads(response.content)
+        else:
+            body = response.content.decode(response.charset or 'utf-8', errors='replace')
+    return {'status': response.status_code, 'body': body}
+
+
+def dispatch(request, item):
+    """Run one sub-request against core/urls.py in-process, authenticated as the batch caller."""
+    parts = urlsplit(item['path'])
+    path = parts.path
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX):]
+    try:
+        match = resolve('/' + path.lstrip('/'), urlconf='core.urls')
+    except Resolver404:
+        return _error(404, 'Not found.')
+    if match.url_name == 'batch' or asyncio.iscoroutinefunction(match.func):
+        return _error(400, 'This endpoint cannot be called from a batch.')
+
+    sub_request = _build_request(
+        request._request, item['method'], path.lstrip('/'), parts.query, item.get('body'), item.get('headers', {}),
+    )
+    sub_request.resolver_match = match
+    # DRF authenticates the sub-request as this user instead of re-running JWT authentication.
+    sub_request._force_auth_user = request.user
+    sub_request._force_auth_token = request.auth
+    try:
+        return _render(match.func(sub_request, *match.args, **match.kwargs))
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', item['method'], item['path'])
+        return _error(500, 'Internal server error.')
+
+
+def run_batch(request, items, atomic=False):
+    """
+    Dispatch sub-requests in order on the current thread (and so the same DB connection).
+
+    In atomic mode they share one transaction: the first failing sub-request rolls everything
+    back and the remaining ones are skipped with status 424.
+    """
+    if not atomic:
+        return [dispatch(request, item) for item in items], False
+
+    responses = []
+    with transaction.atomic():
+        for item in items:
+            result = dispatch(request, item)
+            responses.append(result)
+            if result['status'] >= 400:
+                transaction.set_rollback(True)
+                break
+    rolled_back = responses[-1]['status'] >= 400
+    responses += [_error(424, 'Skipped because an earlier sub-request failed.')] * (len(items) - len(responses))
+    return responses, rolled_back
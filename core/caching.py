@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+
+
+def cached_for_user(user, name, compute):
+    """
+    Return ``compute()`` cached under the user's current bookings version.
+
+    The version lives on the user row, which authentication loads on every request anyway, so
+    a hit needs no booking queries and bumping the version invalidates all of the user's keys.
+    """
+    key = f'bookings:{user.pk}:{user.bookings_version}:{name}'
+    data = cache.get(key)
+    if data is None:
+        data = compute()
+        cache.set(key, data, settings.BOOKING_CACHE_TIMEOUT)
+    return data
+
+
+def bump_bookings_version(user_ids):
+    get_user_model().objects.filter(pk__in=set(user_ids)).update(bookings_version=F('bookings_version') + 1)
@@ -0,0 +1,104 @@
+import csv
+import io
+
+from django.db import transaction
+
+from .caching import bump_bookings_version
+from .models import Booking, Service
+
+# Columns a catalog row may set besides the ``name`` it is matched on.
+CATALOG_FIELDS = ('description', 'price', 'is_active')
+CATALOG_COLUMNS = ('name',) + CATALOG_FIELDS
+
+
+class ServiceImportError(Exception):
+    """Rows that cannot be applied, as a {name: message} mapping."""
+
+    def __init__(self, errors):
+        super().__init__('Some services cannot be imported.')
+        self.errors = errors
+
+
+def parse_csv(content):
+    """
+    Rows from UTF-8 CSV bytes with a header line. Empty cells are left out so they keep the
+    current value; unreadable input raises ValueError.
+    """
+    try:
+        rows = []
+        for record in csv.DictReader(io.StringIO(content.decode('utf-8-sig'))):
+            row = {}
+            for column, value in record.items():
+                column = (column or '').strip().lower()
+                if column in CATALOG_COLUMNS and value is not None and value.strip() != '':
+                    row[column] = value.strip()
+            rows.append(row)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ValueError(f'Could not read the CSV file: {exc}') from exc
+    return rows
+
+
+def _display(value):
+    return value if isinstance(value, bool) else str(value)
+
+
+def upsert_services(services, dry_run=False):
+    """
+    Create or update services from validated catalog rows matched on ``name``, in one transaction.
+
+    Columns missing from a row keep the service's current value; new services need a
+    description and a price. Only new and changed rows are written, with a single
+    bulk_create(update_conflicts=True). Customers with bookings of a repriced service get
+    their cached booking data invalidated once for the whole import.
+    """
+    with transaction.atomic():
+        existing = Service.objects.select_for_update().in_bulk([row['name'] for row in services], field_name='name')
+
+        created, updated, errors = [], [], {}
+        unchanged = 0
+        for row in services:
+            service = existing.get(row['name'])
+            if service is None:
+                missing = [field for field in ('description', 'price') if field not in row]
+                if missing:
+                    errors[row['name']] = f"New services need a value for: {', '.join(missing)}."
+                    continue
+                created.append(Service(**row))
+                continue
+            changes = {}
+            for field in CATALOG_FIELDS:
+                if field in row and row[field] != getattr(service, field):
+                    changes[field] = {'from': _display(getattr(service, field)), 'to': _display(row[field])}
+                    setattr(service, field, row[field])
+            if changes:
+                updated.append((service, changes))
+            else:
+                unchanged += 1
+        if errors:
+            raise ServiceImportError(errors)
+
+        if not dry_run and (created or updated):
+            # Rows go in without their pk so ``name`` is the only key ON CONFLICT can hit.
+            Service.objects.bulk_create(
+                created + [
+                    Service(name=service.name, **{field: getattr(service, field) for field in CATALOG_FIELDS})
+                    for service, _ in updated
+                ],
+                update_conflicts=True,
+                unique_fields=['name'],
+                update_fields=[*CATALOG_FIELDS, 'updated_at'],
+                batch_size=500,
+            )
+            repriced = [service.pk for service, changes in updated if 'price' in changes]
+            if repriced:
+                user_ids = set(
+                    Booking.objects.filter(service__in=repriced).values_list('user_id', flat=True).order_by().distinct()
+                )
+                transaction.on_commit(lambda: bump_bookings_version(user_ids))
+
+    return {
+        'dry_run': dry_run,
+        'created': [service.name for service in created],
+        'updated': [{'name': service.name, 'changes': changes} for service, changes in updated],
+        'unchanged': unchanged,
+    }
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            'The default cache is local to each process.',
+            hint=(
+                'Set REDIS_URL so revenue report invalidation and read-replica pins reach every '
+                'worker; until then other workers may serve a dropped revenue bucket for up to '
+                'REVENUE_REPORT_CACHE_TIMEOUT seconds.'
+            ),
+            id='core.W001',
+        )
+    ]
@@ -0,0 +1,44 @@
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+
+REPLICA_ALIAS = 'replica'
+
+_read_from_replica = contextvars.ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Send ORM reads in this block to the replica (when one is configured)."""
+    token = _read_from_replica.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replica.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Route reads to the replica only inside blocks marked with use_replica().
+
+    Everything else, including every write, migration and management command, uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and replica_configured():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
@@ -0,0 +1,95 @@
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .caching import bump_bookings_version
+from .models import Booking, Technician
+
+SPECIALIST_SCORE = 2
+AREA_SCORE = 3
+
+
+def dispatch_bookings(start, end, dry_run=False):
+    """
+    Assign every unassigned confirmed booking dated start..end to a technician in one pass.
+
+    A technician qualifies when the booking's service is among their skills (or they list no
+    skills) and they have capacity left that day. Among those, the best score wins: an area from
+    their list appearing in the booking address counts most, a listed skill next, and the
+    already-booked share of their day is subtracted to spread the load. Assignments are written
+    with one bulk_update inside a transaction, so the run costs a handful of queries whatever
+    the number of bookings.
+    """
+    technicians = list(Technician.objects.filter(is_active=True))
+    skills = {technician.pk: set() for technician in technicians}
+    for technician_id, service_id in Technician.skills.through.objects.filter(
+        technician_id__in=skills,
+    ).values_list('technician_id', 'service_id'):
+        skills[technician_id].add(service_id)
+    areas = {technician.pk: technician.area_names() for technician in technicians}
+
+    now = timezone.now()
+    assigned = []
+    with transaction.atomic():
+        load = Counter(
+            {
+                (row['technician_id'], row['preferred_date']): row['count']
+                for row in Booking.objects.filter(
+                    technician__in=technicians,
+                    preferred_date__range=(start, end),
+                    status__in=('confirmed', 'completed'),
+                )
+                .values('technician_id', 'preferred_date')
+                .annotate(count=Count('id'))
+                .order_by()
+            }
+        )
+        bookings = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(status='confirmed', technician__isnull=True, preferred_date__range=(start, end))
+            .only('id', 'user_id', 'service_id', 'address', 'preferred_date', 'technician_id', 'updated_at')
+            .order_by('preferred_date', 'created_at')
+        )
+
+        for booking in bookings:
+            address = booking.address.lower()
+            best, best_score = None, None
+            for technician in technicians:
+                used = load[technician.pk, booking.preferred_date]
+                specialist = booking.service_id in skills[technician.pk]
+                if used >= technician.daily_capacity or (skills[technician.pk] and not specialist):
+                    continue
+                score = (
+                    (AREA_SCORE if any(area in address for area in areas[technician.pk]) else 0)
+                    + (SPECIALIST_SCORE if specialist else 0)
+                    - used / technician.daily_capacity
+                )
+                if best_score is None or score > best_score:
+                    best, best_score = technician, score
+            if best is None:
+                continue
+            load[best.pk, booking.preferred_date] += 1
+            booking.technician = best
+            booking.updated_at = now
+            assigned.append(booking)
+
+        if assigned and not dry_run:
+            Booking.objects.bulk_update(assigned, ['technician', 'updated_at'], batch_size=500)
+            user_ids = {booking.user_id for booking in assigned}
+            transaction.on_commit(lambda: bump_bookings_version(user_ids))
+
+    per_technician = Counter(booking.technician for booking in assigned)
+    return {
+        'start': start,
+        'end': end,
+        'dry_run': dry_run,
+        'considered': len(bookings),
+        'assigned': len(assigned),
+        'unassigned': len(bookings) - len(assigned),
+        'per_technician': [
+            {'technician': technician.pk, 'name': technician.name, 'assigned': count}
+            for technician, count in per_technician.most_common()
+        ],
+    }
@@ -0,0 +1,160 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection, connections
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'booking_events'
+# Database alias for the LISTEN connection, configured from BOOKING_EVENTS_LISTEN_URL
+LISTEN_ALIAS = 'booking_events'
+
+
+class Subscription:
+    def __init__(self, loop):
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def put(self, event):
+        self.loop.call_soon_threadsafe(self.queue.put_nowait, event)
+
+
+class BookingEventHub:
+    """
+    In-process publish/subscribe hub for booking status events.
+
+    Publishers run in request threads; subscribers are SSE streams on the event loop. The most
+    recent events are kept so a reconnecting client can resume from its Last-Event-ID. With
+    BOOKING_EVENTS_PG_NOTIFY enabled, events go through PostgreSQL NOTIFY and every worker's
+    listener thread delivers them to its own subscribers. NOTIFY goes out on the request's own
+    connection, which may be pooled; LISTEN holds a session open, so the listener uses the
+    LISTEN_ALIAS connection when one is configured.
+    """
+
+    def __init__(self, backlog=500):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=backlog)
+        self._subscribers = set()
+        self._last_id = 0
+        self._listener = None
+
+    def _next_id(self):
+        # Microsecond timestamps keep ids ordered across workers sharing a NOTIFY channel.
+        with self._lock:
+            self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+            return self._last_id
+
+    def publish(self, payload):
+        event = {'event_id': self._next_id(), **payload}
+        if _notify_enabled():
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, json.dumps(event)])
+        else:
+            self.deliver(event)
+
+    def deliver(self, event):
+        with self._lock:
+            self._last_id = max(self._last_id, event['event_id'])
+            self._recent.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.put(event)
+            except RuntimeError:
+                # The subscriber's event loop has shut down.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, last_event_id=None):
+        """Register a subscriber on the running loop; returns it with the events it missed."""
+        if _notify_enabled():
+            self._ensure_listener()
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+            missed = [] if last_event_id is None else [e for e in self._recent if e['event_id'] > last_event_id]
+        return subscription, missed
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name='booking-events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            alias = LISTEN_ALIAS if LISTEN_ALIAS in connections.databases else 'default'
+            db = connections.create_connection(alias)
+            try:
+                db.connect()
+                db.connection.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                for notify in db.connection.notifies():
+                    self.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception('Booking event listener lost its connection; reconnecting')
+                time.sleep(5)
+            finally:
+                db.close()
+
+
+def _notify_enabled():
+    return settings.BOOKING_EVENTS_PG_NOTIFY and connection.vendor == 'postgresql'
+
+
+hub = BookingEventHub(backlog=settings.BOOKING_EVENTS_BACKLOG)
+
+
+def authenticate_stream(request):
+    """Authenticate an SSE request by Authorization header or ``?token=`` (EventSource cannot set headers)."""
+    authenticator = JWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else request.GET.get('token')
+    if not raw_token:
+        return None
+    try:
+        return authenticator.get_user(authenticator.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _format(event):
+    data = {key: value for key, value in event.items() if key != 'event_id'}
+    return f"id: {event['event_id']}\nevent: booking\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_booking_events(user, last_event_id=None):
+    """
+    Yield SSE frames for the user's booking events (all bookings for admins).
+
+    Streams end after BOOKING_EVENTS_MAX_STREAM_SECONDS; EventSource then reconnects with
+    Last-Event-ID, which also bounds streams whose client went away unnoticed.
+    """
+    subscription, missed = hub.subscribe(last_event_id)
+    deadline = time.monotonic() + settings.BOOKING_EVENTS_MAX_STREAM_SECONDS
+    visible = (lambda event: True) if user.is_admin else (lambda event: event['user'] == user.pk)
+    try:
+        yield f'retry: {settings.BOOKING_EVENTS_RETRY_MS}\n\n'
+        for event in missed:
+            if visible(event):
+                yield _format(event)
+        while time.monotonic() < deadline:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=settings.BOOKING_EVENTS_HEARTBEAT)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if visible(event):
+                yield _format(event)
+    finally:
+        hub.unsubscribe(subscription)
@@ -0,0 +1,154 @@
+import functools
+import json
+import time
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+POLL_INTERVAL = 0.1
+# Credentials are never stored; an ``on_replay`` hook can issue fresh ones for a replay.
+UNSTORED_FIELDS = ('access', 'refresh')
+
+
+def _owner(request, fingerprint):
+    user = request.user
+    if user and user.is_authenticated:
+        return f'user:{user.pk}'
+    # Anonymous clients cannot be told apart, so their keys are scoped to the request itself:
+    # unrelated clients never collide, but reusing a key with another body is not detected.
+    return f'anonymous:{fingerprint[:48]}'
+
+
+def _fingerprint(request):
+    # Keyed with SECRET_KEY: bodies may hold passwords, which a plain hash would expose offline.
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    payload = f'{request.method}\n{request.path}\n{body}'
+    return salted_hmac('core.idempotency', payload, algorithm='sha256').hexdigest()
+
+
+def _storable(data):
+    if isinstance(data, dict):
+        return {field: value for field, value in data.items() if field not in UNSTORED_FIELDS}
+    return data
+
+
+def _lease_expired(record):
+    return record.response_status is None and record.created_at < timezone.now() - settings.IDEMPOTENCY_PENDING_LEASE
+
+
+def _claim(owner, key, fingerprint):
+    """Insert a pending record for the key; returns (record, True) or the existing (record, False)."""
+    now = timezone.now()
+    # Expired keys, and pending claims whose request died before storing an outcome, are free again.
+    IdempotencyKey.objects.filter(owner=owner, key=key).filter(
+        Q(expires_at__lte=now)
+        | Q(response_status__isnull=True, created_at__lt=now - settings.IDEMPOTENCY_PENDING_LEASE)
+    ).delete()
+    try:
+        with transaction.atomic():
+            record = IdempotencyKey.objects.create(
+                owner=owner,
+                key=key,
+                fingerprint=fingerprint,
+                expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+            )
+        return record, True
+    except IntegrityError:
+        return IdempotencyKey.objects.filter(owner=owner, key=key).first(), False
+
+
+def _await_outcome(record, fingerprint, on_replay=None):
+    """Wait for the first request holding the key and replay its response; None if it gave up the key."""
+    if record.fingerprint != fingerprint:
+        return Response(
+            {'detail': 'Idempotency-Key was already used with a different request.'},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    while record.response_status is None:
+        if _lease_expired(record):
+            return None
+        if time.monotonic() >= deadline:
+            return Response(
+                {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        time.sleep(POLL_INTERVAL)
+        try:
+            record.refresh_from_db(fields=['response_status', 'response_body', 'created_at'])
+        except IdempotencyKey.DoesNotExist:
+            return None
+    body = record.response_body
+    if on_replay is not None and status.is_success(record.response_status):
+        body = on_replay(body)
+    return Response(body, status=record.response_status, headers={'Idempotent-Replayed': 'true'})
+
+
+def idempotent(view_method=None, *, on_replay=None):
+    """
+    Make a view method safe to retry with an Idempotency-Key header.
+
+    The first request with a key runs the view and stores its response; retries with the
+    same key and body replay it, and concurrent duplicates wait for the first to finish.
+    A claim left pending longer than IDEMPOTENCY_PENDING_LEASE (its worker died) is taken
+    over by the next retry. The view's writes and its stored outcome commit together, so a
+    retry never re-runs a view whose effects were saved. ``on_replay`` may rewrite a
+    replayed success body. Requests without the header are passed through untouched.
+    """
+    if view_method is None:
+        return functools.partial(idempotent, on_replay=on_replay)
+
+    @functools.wraps(view_method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(view, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {'detail': 'Idempotency-Key must be at most 255 characters.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        fingerprint = _fingerprint(request)
+        owner = _owner(request, fingerprint)
+        while True:
+            record, claimed = _claim(owner, key, fingerprint)
+            if claimed:
+                break
+            if record is not None:
+                response = _await_outcome(record, fingerprint, on_replay)
+                if response is not None:
+                    return response
+
+        try:
+            with transaction.atomic():
+                response = view_method(view, request, *args, **kwargs)
+                # Server errors are not cached so the client can retry them.
+                if response.status_code >= 500:
+                    record.delete()
+                    return response
+                stored = IdempotencyKey.objects.filter(pk=record.pk, response_status__isnull=True).update(
+                    response_status=response.status_code,
+                    response_body=_storable(response.data),
+                )
+                if not stored:
+                    # The lease ran out and a retry took the key over; undo this run's writes.
+                    transaction.set_rollback(True)
+                    return Response(
+                        {'detail': 'A request with this Idempotency-Key is still being processed.'},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+        except Exception:
+            record.delete()
+            raise
+        return response
+
+    return wrapper
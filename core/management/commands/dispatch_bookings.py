@@ -0,0 +1,31 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.dispatch import dispatch_bookings
+
+
+class Command(BaseCommand):
+    help = 'Assign technicians to all unassigned confirmed bookings in a date range.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=date.fromisoformat, help='First date (YYYY-MM-DD); defaults to today.')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date (YYYY-MM-DD); defaults to --start.')
+        parser.add_argument('--dry-run', action='store_true', help='Compute assignments without saving them.')
+
+    def handle(self, *args, **options):
+        start = options['start'] or timezone.localdate()
+        end = options['end'] or start
+        if start > end:
+            raise CommandError('--start must not be after --end')
+        report = dispatch_bookings(start, end, dry_run=options['dry_run'])
+        for row in report['per_technician']:
+            self.stdout.write(f"  {row['name']}: {row['assigned']}")
+        prefix = 'Would assign' if report['dry_run'] else 'Assigned'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix} {report['assigned']} of {report['considered']} bookings "
+                f"({report['unassigned']} left without a technician)"
+            )
+        )
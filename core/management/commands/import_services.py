@@ -0,0 +1,53 @@
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import ServiceImportError, parse_csv, upsert_services
+from core.serializers import ServiceImportSerializer
+
+
+class Command(BaseCommand):
+    help = 'Create or update services, matched on name, from a CSV or JSON price list.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON file, or '-' for standard input.")
+        parser.add_argument('--format', choices=['csv', 'json'], help='Input format; guessed from the file extension.')
+        parser.add_argument('--dry-run', action='store_true', help='Report the changes without saving them.')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('json' if path.lower().endswith('.json') else 'csv')
+        try:
+            content = sys.stdin.buffer.read() if path == '-' else Path(path).read_bytes()
+        except OSError as exc:
+            raise CommandError(f'Cannot read {path}: {exc}')
+
+        try:
+            rows = json.loads(content) if fmt == 'json' else parse_csv(content)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if isinstance(rows, dict):
+            rows = rows.get('services')
+
+        serializer = ServiceImportSerializer(data={'services': rows, 'dry_run': options['dry_run']})
+        if not serializer.is_valid():
+            raise CommandError(json.dumps(serializer.errors, indent=2))
+        try:
+            report = upsert_services(**serializer.validated_data)
+        except ServiceImportError as exc:
+            raise CommandError('\n'.join(f'{name}: {message}' for name, message in exc.errors.items()))
+
+        for name in report['created']:
+            self.stdout.write(f'  + {name}')
+        for row in report['updated']:
+            changes = ', '.join(f"{field} {change['from']} -> {change['to']}" for field, change in row['changes'].items())
+            self.stdout.write(f"  ~ {row['name']}: {changes}")
+        prefix = 'Dry run, nothing saved: ' if report['dry_run'] else ''
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}{len(report['created'])} created, {len(report['updated'])} updated, "
+                f"{report['unchanged']} unchanged"
+            )
+        )
@@ -0,0 +1,72 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+PROFILE_SCRIPT = '''
+import json
+import time
+
+timings = {}
+started = time.perf_counter()
+from django.conf import settings
+settings.INSTALLED_APPS
+timings['settings'] = time.perf_counter() - started
+
+started = time.perf_counter()
+import django
+django.setup(set_prefix=False)
+timings['django.setup'] = time.perf_counter() - started
+
+started = time.perf_counter()
+from django.core.asgi import get_asgi_application
+get_asgi_application()
+timings['application (middleware, whitenoise scan)'] = time.perf_counter() - started
+
+from core import warmup
+timings.update({f'warmup: {name}': seconds for name, seconds in warmup.run().items()})
+print(json.dumps(timings))
+'''
+
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+class Command(BaseCommand):
+    help = 'Boot the web application in a fresh interpreter and report where start-up time goes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Number of slowest imports to list.')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE, 'WARMUP_ON_BOOT': 'False'}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'Start-up failed:\n{result.stderr[-2000:]}')
+
+        phases = json.loads(result.stdout.strip().splitlines()[-1])
+        self.stdout.write(self.style.MIGRATE_HEADING('Start-up phases'))
+        for name, seconds in phases.items():
+            self.stdout.write(f'  {seconds * 1000:9.1f} ms  {name}')
+        self.stdout.write(f'  {sum(phases.values()) * 1000:9.1f} ms  total')
+
+        imports = []
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            # Only top-level imports; nested ones are already included in their parent's cumulative time.
+            if match and len(match.group(3)) == 1:
+                imports.append((int(match.group(2)), int(match.group(1)), match.group(4)))
+        imports.sort(reverse=True)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Slowest top-level imports ({len(imports)} total)'))
+        self.stdout.write('  cumulative      self  module')
+        for cumulative, own, module in imports[:options['limit']]:
+            self.stdout.write(f'  {cumulative / 1000:7.1f} ms {own / 1000:6.1f} ms  {module}')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import BookingTombstone
+
+
+class Command(BaseCommand):
+    help = 'Delete booking tombstones older than SYNC_TOMBSTONE_RETENTION.'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - settings.SYNC_TOMBSTONE_RETENTION
+        deleted, _ = BookingTombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} booking tombstones'))
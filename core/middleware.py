@@ -0,0 +1,178 @@
+import re
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .db_router import replica_configured, use_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PRIMARY_PIN_COOKIE = 'pin_primary'
+
+# Limiters of the active LoadSheddingMiddleware, by endpoint class, for the metrics endpoint.
+concurrency_limiters = {}
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Serve reads for safe requests from the replica database.
+
+    A client that has just written is pinned to the primary for REPLICA_PIN_SECONDS, so it
+    always reads its own writes despite replication lag. Bearer-token clients (the SPA, mobile
+    apps) are pinned by user id in the cache, which must be shared by all workers; browser
+    sessions such as the admin also get a short-lived cookie.
+    """
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.authenticator = JWTAuthentication()
+
+    def _pin_key(self, request):
+        # The token is only verified here (no DB query); the view authenticates it again.
+        header = self.authenticator.get_header(request)
+        raw_token = self.authenticator.get_raw_token(header) if header else None
+        if raw_token is None:
+            return None
+        try:
+            token = self.authenticator.get_validated_token(raw_token)
+        except InvalidToken:
+            return None
+        return f'replica_pin:user:{token.get(jwt_settings.USER_ID_CLAIM)}'
+
+    def __call__(self, request):
+        pin_key = self._pin_key(request)
+        if request.method in SAFE_METHODS:
+            pinned = PRIMARY_PIN_COOKIE in request.COOKIES or (pin_key is not None and cache.get(pin_key))
+            with use_replica(not pinned):
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        if pin_key is not None:
+            cache.set(pin_key, True, settings.REPLICA_PIN_SECONDS)
+        secure = settings.SESSION_COOKIE_SECURE
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            '1',
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            secure=secure,
+            samesite='None' if secure else 'Lax',
+        )
+        return response
+
+
+class ConcurrencyLimiter:
+    """Bounded number of concurrent requests, with counters describing its occupancy."""
+
+    def __init__(self, name, limit, timeout):
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.served = 0
+        self.rejected = 0
+
+    def acquire(self):
+        with self._lock:
+            self.waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        self._slots.release()
+        with self._lock:
+            self.in_flight -= 1
+            self.served += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'class': self.name,
+                'limit': self.limit,
+                'queue_timeout': self.timeout,
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'served': self.served,
+                'rejected': self.rejected,
+            }
+
+
+class LoadSheddingMiddleware:
+    """
+    Cap concurrent requests per endpoint class (see LOAD_SHEDDING_CLASSES).
+
+    A request waits at most its class's queue timeout for a slot and then fails fast with
+    503 and Retry-After, so slow reports cannot starve cheap endpoints. Limits are per process.
+    A class's 'admin_paths' only count for admins, which costs a user lookup on those paths.
+    """
+
+    def __init__(self, get_response):
+        if not settings.LOAD_SHEDDING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.exempt = [re.compile(pattern) for pattern in settings.LOAD_SHEDDING_EXEMPT_PATHS]
+        self.classes = []
+        for config in settings.LOAD_SHEDDING_CLASSES:
+            limiter = ConcurrencyLimiter(config['name'], config['limit'], config['timeout'])
+            paths = [re.compile(pattern) for pattern in config.get('paths', ())]
+            admin_paths = [re.compile(pattern) for pattern in config.get('admin_paths', ())]
+            self.classes.append((paths, admin_paths, set(config.get('methods', ())), limiter))
+        concurrency_limiters.clear()
+        concurrency_limiters.update({limiter.name: limiter for *_, limiter in self.classes})
+
+    def _is_admin(self, request):
+        # Runs before DRF authenticates the request, so read the bearer token here.
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return bool(authenticated and authenticated[0].is_admin)
+
+    def _matches(self, request, paths, admin_paths):
+        if any(pattern.match(request.path) for pattern in paths):
+            return True
+        return any(pattern.match(request.path) for pattern in admin_paths) and self._is_admin(request)
+
+    def _limiter_for(self, request):
+        if any(pattern.match(request.path) for pattern in self.exempt):
+            return None
+        for paths, admin_paths, methods, limiter in self.classes:
+            if (paths or admin_paths) and not self._matches(request, paths, admin_paths):
+                continue
+            if methods and request.method not in methods:
+                continue
+            return limiter
+        return None
+
+    def __call__(self, request):
+        limiter = self._limiter_for(request)
+        if limiter is None:
+            return self.get_response(request)
+        if not limiter.acquire():
+            response = JsonResponse(
+                {'detail': 'The server is busy. Please retry shortly.'},
+                status=503,
+            )
+            response['Retry-After'] = str(settings.LOAD_SHEDDING_RETRY_AFTER)
+            return response
+        try:
+            return self.get_response(request)
+        finally:
+            limiter.release()
@@ -0,0 +1,32 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_price_at_booking(apps, schema_editor):
+    Booking = apps.get_model('core', 'Booking')
+    Service = apps.get_model('core', 'Service')
+    # Historical prices were never recorded, so existing bookings take the current service price.
+    Booking.objects.using(schema_editor.connection.alias).filter(price_at_booking__isnull=True).update(
+        price_at_booking=Subquery(Service.objects.filter(pk=OuterRef('service_id')).values('price')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='price_at_booking',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_price_at_booking, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='price_at_booking',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10),
+        ),
+    ]
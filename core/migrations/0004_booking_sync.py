@@ -0,0 +1,37 @@
+# Generated by Django 4.2.9 on 2026-10-19 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_booking_price_at_booking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_id', models.BigIntegerField()),
+                ('user_id', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'db_table': 'booking_tombstones',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at', 'id'], name='bookings_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='bookings_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingtombstone',
+            index=models.Index(fields=['user_id', 'id'], name='tombstones_user_id_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+import core.models
+import django.db.models.functions.text
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import Lower
+
+
+def check_case_insensitive_duplicates(apps, schema_editor):
+    User = apps.get_model('core', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    problems = []
+    for field in ('username', 'email'):
+        duplicates = (
+            users.exclude(**{field: ''})
+            .annotate(value=Lower(field))
+            .values('value')
+            .annotate(count=Count('id'))
+            .filter(count__gt=1)
+            .values_list('value', flat=True)
+        )
+        problems += [f"{field} '{value}'" for value in duplicates]
+    if problems:
+        raise RuntimeError(
+            'Cannot add case-insensitive unique constraints on users; these values are shared by '
+            'several accounts (merge or rename them first): ' + ', '.join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_booking_sync'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='user',
+            managers=[
+                ('objects', core.models.UserManager()),
+            ],
+        ),
+        migrations.RunPython(check_case_insensitive_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('username'), name='users_username_lower_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), condition=models.Q(('email', ''), _negated=True), name='users_email_lower_unique'),
+        ),
+    ]
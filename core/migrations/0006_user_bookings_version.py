@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-19 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_user_case_insensitive_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='bookings_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
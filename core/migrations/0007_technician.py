@@ -0,0 +1,45 @@
+# Generated by Django 4.2.9 on 2026-10-19 20:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_user_bookings_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Technician',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('areas', models.TextField(blank=True, default='', help_text='Comma-separated area names, matched against booking addresses.')),
+                ('daily_capacity', models.PositiveSmallIntegerField(default=4)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'technicians',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='technician',
+            name='skills',
+            field=models.ManyToManyField(blank=True, help_text='Services this technician handles. Leave empty for a generalist.', related_name='technicians', to='core.service'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='technician',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='core.technician'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'confirmed'), ('technician__isnull', True)), fields=['preferred_date'], name='bookings_undispatched_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.9 on 2026-10-19 20:24
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_names(apps, schema_editor):
+    Service = apps.get_model('core', 'Service')
+    duplicates = (
+        Service.objects.using(schema_editor.connection.alias)
+        .values('name')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values_list('name', flat=True)
+    )
+    if duplicates:
+        raise RuntimeError(
+            'Cannot make service names unique; these names are used by several services '
+            '(merge or rename them first): ' + ', '.join(f"'{name}'" for name in duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_technician'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_names, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='service',
+            name='name',
+            field=models.CharField(max_length=200, unique=True),
+        ),
+    ]
@@ -1,6 +1,21 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as DjangoUserManager
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .signals import booking_status_changed
+
+
+class UserManager(DjangoUserManager):
+    # Filtering on LOWER(column) lets these lookups use the functional unique indexes.
+    def with_username(self, username):
+        return self.alias(username_lower=Lower('username')).filter(username_lower=username.strip().lower())
+
+    def with_email(self, email):
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.strip().lower())
 
 
 class User(AbstractUser):
@@ -8,20 +23,42 @@ class User(AbstractUser):
     is_admin = models.BooleanField(default=False)
     phone = models.CharField(max_length=20, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
+    # Bumped on every change to the user's bookings; part of their response cache keys.
+    bookings_version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UserManager()
+
     class Meta:
         db_table = 'users'
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(Lower('username'), name='users_username_lower_unique'),
+            models.UniqueConstraint(
+                Lower('email'),
+                condition=~models.Q(email=''),
+                name='users_email_lower_unique',
+            ),
+        ]
 
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        # bookings_version only moves through F() updates (core.caching); a full save of an
+        # instance loaded earlier must not write an old version back over a newer one.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'bookings_version'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Service(models.Model):
     """Model for PC maintenance services."""
-    name = models.CharField(max_length=200)
+    name = models.CharField(max_length=200, unique=True)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     is_active = models.BooleanField(default=True)
@@ -36,6 +73,68 @@ class Service(models.Model):
         return f"{self.name} - TZS {self.price}"
 
 
+class Technician(models.Model):
+    """Technician that confirmed bookings are dispatched to."""
+    name = models.CharField(max_length=200)
+    phone = models.CharField(max_length=20, blank=True, null=True)
+    skills = models.ManyToManyField(
+        Service,
+        blank=True,
+        related_name='technicians',
+        help_text='Services this technician handles. Leave empty for a generalist.',
+    )
+    areas = models.TextField(
+        blank=True,
+        default='',
+        help_text='Comma-separated area names, matched against booking addresses.',
+    )
+    daily_capacity = models.PositiveSmallIntegerField(default=4)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'technicians'
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def area_names(self):
+        return [area.strip().lower() for area in self.areas.split(',') if area.strip()]
+
+
+class BookingQuerySet(models.QuerySet):
+    def transition(self, status, rows=None, **fields):
+        """
+        Move the matching bookings to ``status`` with a single conditional UPDATE.
+
+        Only rows whose current status allows the transition are touched, so a concurrent
+        change is never overwritten. Returns the number of bookings moved.
+
+        Callers that already hold the matched bookings pass their (pk, user_id, created_at)
+        as ``rows``; booking_status_changed then reports them instead of re-reading the moved
+        rows, as long as every one of them moved.
+        """
+        if status not in self.model.TRANSITIONS:
+            raise ValueError(f"Unknown booking status: {status}")
+        sources = [source for source, targets in self.model.TRANSITIONS.items() if status in targets]
+        updated_at = fields.setdefault('updated_at', timezone.now())
+        moved = self.filter(status__in=sources).update(status=status, **fields)
+        if moved and booking_status_changed.has_listeners(self.model):
+            if rows is None or moved != len(rows):
+                rows = list(
+                    self.filter(status=status, updated_at=updated_at).values_list('pk', 'user_id', 'created_at')
+                )
+            booking_status_changed.send(
+                sender=self.model,
+                bookings=[(pk, user_id) for pk, user_id, _ in rows],
+                created_at=[created_at for _, _, created_at in rows],
+                status=status,
+            )
+        return moved
+
+
 class Booking(models.Model):
     """Model for PC maintenance bookings."""
     STATUS_CHOICES = [
@@ -45,6 +144,16 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
     ]
 
+    # Allowed status changes; completed and cancelled bookings are final.
+    TRANSITIONS = {
+        'pending': ('confirmed', 'completed', 'cancelled'),
+        'confirmed': ('completed', 'cancelled'),
+        'completed': (),
+        'cancelled': (),
+    }
+    # Statuses in which the service (and so the price snapshot) may still change.
+    OPEN_STATUSES = ('pending', 'confirmed')
+
     PAYMENT_METHOD_CHOICES = [
         ('cash', 'Cash on Delivery'),
         ('card', 'Card Payment'),
@@ -73,12 +182,82 @@ class Booking(models.Model):
         default='cash',
     )
     notes = models.TextField(blank=True, null=True)
+    technician = models.ForeignKey(
+        Technician,
+        on_delete=models.SET_NULL,
+        related_name='bookings',
+        blank=True,
+        null=True,
+    )
+    # Service price when the booking was made; revenue reports must not follow later price changes.
+    price_at_booking = models.DecimalField(max_digits=10, decimal_places=2, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = BookingQuerySet.as_manager()
+
     class Meta:
         db_table = 'bookings'
         ordering = ['-created_at']
+        indexes = [
+            # Keyset scans for the delta-sync feed (all bookings, and one customer's bookings).
+            models.Index(fields=['updated_at', 'id'], name='bookings_updated_at_id_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='bookings_user_updated_idx'),
+            # Confirmed bookings still waiting for a technician, scanned by date by the dispatcher.
+            models.Index(
+                fields=['preferred_date'],
+                condition=models.Q(status='confirmed', technician__isnull=True),
+                name='bookings_undispatched_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Booking #{self.id} - {self.user.username} - {self.service.name}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        # The owner as loaded, so moving a booking to another user can invalidate both caches.
+        booking._loaded_user_id = booking.__dict__.get('user_id')
+        return booking
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.price_at_booking is None:
+            self.price_at_booking = self.service.price
+        super().save(*args, **kwargs)
+
+
+class BookingTombstone(models.Model):
+    """Marker left behind by a deleted booking so delta-sync clients can drop it."""
+    booking_id = models.BigIntegerField()
+    user_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        db_table = 'booking_tombstones'
+        indexes = [
+            models.Index(fields=['user_id', 'id'], name='tombstones_user_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Deleted booking #{self.booking_id}"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a POST request sent with an Idempotency-Key header."""
+    key = models.CharField(max_length=255)
+    owner = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(blank=True, null=True)
+    response_body = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['owner', 'key'], name='idempotency_key_owner_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.owner} - {self.key}"
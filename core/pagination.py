@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_row_count(model, using='default'):
+    """Return PostgreSQL's planner estimate of a table's row count, or None if unavailable."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+            [connection.ops.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that have never been vacuumed or analyzed.
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the planner's row estimate for large unfiltered querysets.
+
+    Filtered querysets and tables below ESTIMATED_COUNT_THRESHOLD still get an exact COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model, using=self.object_list.db)
+            threshold = settings.ESTIMATED_COUNT_THRESHOLD
+            if estimate is not None and estimate > threshold:
+                return estimate
+        return super().count
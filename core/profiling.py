@@ -0,0 +1,150 @@
+import cProfile
+import json
+import logging
+import random
+import re
+import time
+import uuid
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+# Names start with a microsecond UTC timestamp so they sort by age.
+PROFILE_NAME = re.compile(r'^\d{8}T\d{12}-[0-9a-f]{8}$')
+
+
+class QueryRecorder:
+    def __init__(self, alias, queries):
+        self.alias = alias
+        self.queries = queries
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {'database': self.alias, 'sql': sql, 'duration_ms': round((time.perf_counter() - started) * 1000, 3)}
+            )
+
+
+def _profile_dir():
+    return Path(settings.PROFILING_DIR)
+
+
+def profile_path(name, suffix):
+    if not PROFILE_NAME.match(name):
+        return None
+    return _profile_dir() / f'{name}{suffix}'
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first (without their SQL logs)."""
+    profiles = []
+    for path in sorted(_profile_dir().glob('*.json'), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        meta.pop('queries', None)
+        profiles.append(meta)
+    return profiles
+
+
+def load_profile(name):
+    path = profile_path(name, '.json')
+    if path is None or not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def _save(request, response, profiler, queries, duration, trigger):
+    directory = _profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    created_at = timezone.now()
+    name = f"{created_at:%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+    profiler.dump_stats(directory / f'{name}.prof')
+    meta = {
+        'name': name,
+        'created_at': created_at.isoformat(),
+        'method': request.method,
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'duration_ms': round(duration * 1000, 3),
+        'trigger': trigger,
+        'query_count': len(queries),
+        'query_time_ms': round(sum(query['duration_ms'] for query in queries), 3),
+        'queries': queries,
+    }
+    (directory / f'{name}.json').write_text(json.dumps(meta))
+
+    # Keep only the newest PROFILING_MAX_FILES profiles.
+    for old in sorted(directory.glob('*.json'), reverse=True)[settings.PROFILING_MAX_FILES:]:
+        for path in (old, old.with_suffix('.prof')):
+            path.unlink(missing_ok=True)
+    return name
+
+
+class ProfilingMiddleware:
+    """
+    Profile selected requests with cProfile and record their SQL.
+
+    A request is profiled when an admin sends the PROFILING_HEADER header or when it falls in
+    the PROFILING_SAMPLE_RATE sample. Results go to a bounded ring of files in PROFILING_DIR.
+    With PROFILING_ENABLED off the middleware removes itself from the stack.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace('-', '_')
+
+    def _trigger(self, request):
+        if request.META.get(self.header) and self._is_admin(request):
+            return 'header'
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sample'
+        return None
+
+    def _is_admin(self, request):
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                authenticated = JWTAuthentication().authenticate(request)
+            except AuthenticationFailed:
+                return False
+            user = authenticated[0] if authenticated else None
+        return bool(user and user.is_authenticated and user.is_admin)
+
+    def __call__(self, request):
+        trigger = self._trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        queries = []
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for db in connections.all():
+                stack.enter_context(db.execute_wrapper(QueryRecorder(db.alias, queries)))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = time.perf_counter() - started
+
+        try:
+            response['X-Profile-Id'] = _save(request, response, profiler, queries, duration, trigger)
+        except OSError:
+            logger.exception('Could not store request profile')
+        return response
@@ -0,0 +1,87 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import bump_bookings_version
+from .events import hub
+from .models import Booking, BookingTombstone, Service, User
+from .reports import invalidate_revenue_buckets
+from .signals import booking_status_changed
+
+
+@receiver(post_delete, sender=Booking)
+def record_booking_tombstone(sender, instance, **kwargs):
+    BookingTombstone.objects.create(booking_id=instance.pk, user_id=instance.user_id)
+
+
+@receiver(post_save, sender=Booking)
+def publish_booking_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'status' not in update_fields:
+        return
+    event = {'id': instance.pk, 'user': instance.user_id, 'status': instance.status, 'created': created}
+    transaction.on_commit(lambda: hub.publish(event))
+
+
+@receiver(booking_status_changed, sender=Booking)
+def publish_booking_status_changed(sender, bookings, status, **kwargs):
+    events = [{'id': pk, 'user': user_id, 'status': status, 'created': False} for pk, user_id in bookings]
+
+    def publish():
+        for event in events:
+            hub.publish(event)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_user_bookings_cache(sender, instance, **kwargs):
+    user_ids = {instance.user_id, getattr(instance, '_loaded_user_id', None) or instance.user_id}
+    instance._loaded_user_id = instance.user_id
+    transaction.on_commit(lambda: bump_bookings_version(user_ids))
+
+
+@receiver(post_save, sender=Service)
+def invalidate_bookings_cache_on_service_change(sender, instance, created, update_fields=None, **kwargs):
+    # Cached booking payloads embed the service's name and price.
+    if created or (update_fields is not None and not {'name', 'price'} & set(update_fields)):
+        return
+    service_id = instance.pk
+
+    def bump():
+        bump_bookings_version(
+            Booking.objects.filter(service_id=service_id).values_list('user_id', flat=True).order_by().distinct()
+        )
+
+    transaction.on_commit(bump)
+
+
+@receiver(post_save, sender=User)
+def invalidate_bookings_cache_on_profile_change(sender, instance, created, update_fields=None, **kwargs):
+    # Cached booking payloads embed the owner's username and email.
+    if created or (update_fields is not None and not {'username', 'email'} & set(update_fields)):
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_bookings_version([user_id]))
+
+
+@receiver(booking_status_changed, sender=Booking)
+def invalidate_bookings_cache_on_transition(sender, bookings, **kwargs):
+    user_ids = [user_id for _, user_id in bookings]
+    transaction.on_commit(lambda: bump_bookings_version(user_ids))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_revenue_report(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'status', 'service', 'price_at_booking'} & set(update_fields):
+        return
+    created_at = instance.created_at
+    transaction.on_commit(lambda: invalidate_revenue_buckets([created_at]))
+
+
+@receiver(booking_status_changed, sender=Booking)
+def invalidate_revenue_report_on_transition(sender, created_at, status, **kwargs):
+    # Only completed bookings count towards revenue.
+    if status == 'completed':
+        transaction.on_commit(lambda: invalidate_revenue_buckets(created_at))
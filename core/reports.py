@@ -0,0 +1,150 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .caching import cached_for_user
+from .models import Booking, Service
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def booking_stats(user):
+    """Booking counts for the user (all bookings and revenue for admins) in one aggregate query."""
+    if user.is_admin:
+        stats = Booking.objects.aggregate(
+            total_bookings=Count('id'),
+            pending_bookings=Count('id', filter=Q(status='pending')),
+            completed_bookings=Count('id', filter=Q(status='completed')),
+            cancelled_bookings=Count('id', filter=Q(status='cancelled')),
+            revenue=Sum('price_at_booking', filter=Q(status='completed')),
+        )
+        stats['revenue'] = float(stats['revenue'] or 0)
+        return stats
+    return cached_for_user(
+        user,
+        'stats',
+        lambda: Booking.objects.filter(user=user).aggregate(
+            total_bookings=Count('id'),
+            pending_bookings=Count('id', filter=Q(status='pending')),
+            completed_bookings=Count('id', filter=Q(status='completed')),
+        ),
+    )
+
+
+def period_start(day, period):
+    """First date of the day/week/month bucket containing ``day`` (weeks start on Monday)."""
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def next_period(day, period):
+    if period == 'week':
+        return day + timedelta(weeks=1)
+    if period == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _local_midnight(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _cache_key(period, bucket):
+    return f'reports:revenue:v2:{period}:{bucket.isoformat()}'
+
+
+def invalidate_revenue_buckets(created_ats):
+    """Drop the cached buckets, for every period, holding bookings created at these times."""
+    days = {timezone.localtime(created_at).date() for created_at in created_ats}
+    cache.delete_many([_cache_key(period, period_start(day, period)) for day in days for period in PERIODS])
+
+
+def _aggregate(period, start, end):
+    """Revenue and booking counts per (bucket, service) for buckets in [start, end), in one query."""
+    rows = (
+        Booking.objects.filter(created_at__gte=_local_midnight(start), created_at__lt=_local_midnight(end))
+        .annotate(bucket=PERIODS[period]('created_at'))
+        .values('bucket', 'service_id')
+        .annotate(
+            bookings=Count('id'),
+            completed_bookings=Count('id', filter=Q(status='completed')),
+            revenue=Sum('price_at_booking', filter=Q(status='completed')),
+        )
+        .order_by('bucket', 'service_id')
+    )
+    buckets = {}
+    day = start
+    while day < end:
+        buckets[day] = []
+        day = next_period(day, period)
+    for row in rows:
+        buckets[timezone.localtime(row['bucket']).date()].append(
+            {
+                'service': row['service_id'],
+                'bookings': row['bookings'],
+                'completed_bookings': row['completed_bookings'],
+                'revenue': float(row['revenue'] or 0),
+            }
+        )
+    return buckets
+
+
+def revenue_report(period, start, end):
+    """
+    Revenue and booking counts per service, bucketed by ``period``, for the buckets covering start..end.
+
+    Buckets that closed before the current one are served from the cache; booking changes that
+    affect one drop it (see receivers), so it is recomputed on the next request. Service names
+    are looked up per request rather than cached, so renames show up immediately.
+    """
+    first = period_start(start, period)
+    stop = next_period(period_start(end, period), period)
+    current = period_start(timezone.localdate(), period)
+
+    buckets = {}
+    closed_stop = max(first, min(stop, current))
+    if first < closed_stop:
+        keys = {}
+        day = first
+        while day < closed_stop:
+            keys[_cache_key(period, day)] = day
+            day = next_period(day, period)
+        cached = cache.get_many(keys)
+        buckets.update({keys[key]: rows for key, rows in cached.items()})
+        missing = sorted(day for key, day in keys.items() if key not in cached)
+        if missing:
+            computed = _aggregate(period, missing[0], next_period(missing[-1], period))
+            computed = {day: rows for day, rows in computed.items() if day in missing}
+            cache.set_many(
+                {_cache_key(period, day): rows for day, rows in computed.items()},
+                timeout=settings.REVENUE_REPORT_CACHE_TIMEOUT,
+            )
+            buckets.update(computed)
+    if closed_stop < stop:
+        buckets.update(_aggregate(period, closed_stop, stop))
+
+    names = dict(
+        Service.objects.filter(
+            pk__in={row['service'] for rows in buckets.values() for row in rows},
+        ).values_list('pk', 'name')
+    )
+    return [
+        {
+            'period_start': day,
+            'bookings': sum(row['bookings'] for row in rows),
+            'revenue': sum(row['revenue'] for row in rows),
+            'services': [{**row, 'service_name': names.get(row['service'])} for row in rows],
+        }
+        for day, rows in sorted(buckets.items())
+    ]
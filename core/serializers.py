@@ -1,7 +1,14 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
 
+from .exceptions import Conflict
 from .models import Booking, Service
 
 User = get_user_model()
@@ -27,6 +34,18 @@ class RegisterSerializer(serializers.ModelSerializer):
             'username', 'email', 'password', 'password_confirm',
             'first_name', 'last_name', 'phone', 'address',
         )
+        # Uniqueness is checked case-insensitively in validate_username instead.
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+    def validate_username(self, value):
+        if User.objects.with_username(value).exists():
+            raise serializers.ValidationError('A user with that username already exists.')
+        return value
+
+    def validate_email(self, value):
+        if value and User.objects.with_email(value).exists():
+            raise serializers.ValidationError('A user with that email already exists.')
+        return value
 
     def validate(self, attrs):
         attrs['username'] = attrs['username'].strip()
@@ -43,7 +62,11 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password_confirm')
-        return User.objects.create_user(**validated_data)
+        try:
+            return User.objects.create_user(**validated_data)
+        except IntegrityError:
+            # Lost a race with a concurrent registration for the same username or email.
+            raise serializers.ValidationError({'username': 'A user with that username or email already exists.'})
 
 
 class LoginSerializer(serializers.Serializer):
@@ -67,6 +90,12 @@ class UpdateProfileSerializer(serializers.ModelSerializer):
         model = User
         fields = ('first_name', 'last_name', 'email', 'phone', 'address')
 
+    def validate_email(self, value):
+        value = value.strip().lower()
+        if value and User.objects.with_email(value).exclude(pk=self.instance.pk).exists():
+            raise serializers.ValidationError('A user with that email already exists.')
+        return value
+
 
 class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -91,15 +120,38 @@ class BookingSerializer(serializers.ModelSerializer):
         model = Booking
         fields = (
             'id', 'user', 'user_name', 'user_email', 'service', 'service_name',
-            'service_price', 'problem_description', 'preferred_date', 'status',
-            'address', 'phone', 'payment_method', 'notes', 'created_at', 'updated_at',
+            'service_price', 'price_at_booking', 'problem_description', 'preferred_date', 'status',
+            'address', 'phone', 'payment_method', 'notes', 'technician', 'created_at', 'updated_at',
         )
-        read_only_fields = ('id', 'user', 'status', 'created_at', 'updated_at')
+        read_only_fields = ('id', 'user', 'status', 'technician', 'created_at', 'updated_at')
 
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         return super().create(validated_data)
 
+    def update(self, instance, validated_data):
+        # Write only the submitted columns so a concurrent status change is not overwritten.
+        fields = [*validated_data, 'updated_at']
+        service = validated_data.get('service')
+        with transaction.atomic():
+            if service is not None and service.pk != instance.service_id:
+                # The price of completed or cancelled bookings is recorded revenue; keep it frozen.
+                current = (
+                    Booking.objects.select_for_update()
+                    .filter(pk=instance.pk)
+                    .values_list('status', flat=True)
+                    .first()
+                )
+                if current not in Booking.OPEN_STATUSES:
+                    raise Conflict(f"The service of a {current} booking cannot be changed.")
+                # A booking moved to another service is charged that service's current price.
+                instance.price_at_booking = service.price
+                fields.append('price_at_booking')
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            instance.save(update_fields=fields)
+        return instance
+
 
 class BookingListSerializer(serializers.ModelSerializer):
     service_name = serializers.CharField(source='service.name', read_only=True)
@@ -122,4 +174,101 @@ class BookingCreateSerializer(serializers.ModelSerializer):
 class BookingUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Booking
-        fields = ('status', 'notes')
+        fields = ('status', 'notes', 'technician')
+
+    def update(self, instance, validated_data):
+        status = validated_data.pop('status', instance.status)
+        if status != instance.status:
+            validated_data['updated_at'] = timezone.now()
+            rows = [(instance.pk, instance.user_id, instance.created_at)]
+            if not Booking.objects.filter(pk=instance.pk).transition(status, rows=rows, **validated_data):
+                raise Conflict(f"Cannot change booking status to '{status}' from its current status.")
+            validated_data['status'] = status
+            for attr, value in validated_data.items():
+                setattr(instance, attr, value)
+            return instance
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=[*validated_data, 'updated_at'])
+        return instance
+
+
+class RevenueReportQuerySerializer(serializers.Serializer):
+    DEFAULT_SPAN = {
+        'day': timedelta(days=29),
+        'week': timedelta(weeks=11),
+        'month': timedelta(days=334),
+    }
+    MAX_SPAN = timedelta(days=366 * 3)
+
+    period = serializers.ChoiceField(choices=('day', 'week', 'month'), default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        attrs.setdefault('end', timezone.localdate())
+        attrs.setdefault('start', attrs['end'] - self.DEFAULT_SPAN[attrs['period']])
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': 'Start date must not be after end date.'})
+        if attrs['end'] - attrs['start'] > self.MAX_SPAN:
+            raise serializers.ValidationError({'start': 'Reports are limited to three years.'})
+        return attrs
+
+
+class BookingChangesQuerySerializer(serializers.Serializer):
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=100)
+
+
+class DashboardQuerySerializer(serializers.Serializer):
+    recent = serializers.IntegerField(min_value=1, max_value=50, default=5)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(choices=('GET', 'POST', 'PUT', 'PATCH', 'DELETE'))
+    path = serializers.CharField(max_length=500)
+    body = serializers.JSONField(required=False)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(child=BatchItemSerializer(), min_length=1)
+    atomic = serializers.BooleanField(default=False)
+
+    def validate_requests(self, value):
+        if len(value) > settings.BATCH_MAX_REQUESTS:
+            raise serializers.ValidationError(f'A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests.')
+        return value
+
+
+class DispatchSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    end = serializers.DateField()
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs['start'] > attrs['end']:
+            raise serializers.ValidationError({'start': 'Start date must not be after end date.'})
+        return attrs
+
+
+class ServiceImportRowSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(required=False)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    is_active = serializers.BooleanField(required=False)
+
+
+class ServiceImportSerializer(serializers.Serializer):
+    services = ServiceImportRowSerializer(many=True, allow_empty=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate_services(self, value):
+        if len(value) > settings.SERVICE_IMPORT_MAX_ROWS:
+            raise serializers.ValidationError(f'An import may contain at most {settings.SERVICE_IMPORT_MAX_ROWS} rows.')
+        seen, repeated = set(), set()
+        for row in value:
+            (repeated if row['name'] in seen else seen).add(row['name'])
+        if repeated:
+            raise serializers.ValidationError(f"Services listed more than once: {', '.join(sorted(repeated))}.")
+        return value
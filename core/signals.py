@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by BookingQuerySet.transition() after its UPDATE, which bypasses post_save.
+# Arguments: bookings (list of (booking_id, user_id) pairs), created_at (their creation
+# times, in the same order) and status.
+booking_status_changed = Signal()
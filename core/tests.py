@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Booking, Service, User
+
+
+class DashboardQueryCountTests(TestCase):
+    """The dashboard is the landing call of every client; its query count must not drift."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('admin', 'admin@example.com', 'pass', is_admin=True)
+        cls.customer = User.objects.create_user('customer', 'customer@example.com', 'pass')
+        other = User.objects.create_user('other', 'other@example.com', 'pass')
+        services = [
+            Service.objects.create(name=f'Service {i}', description='', price=10 * (i + 1)) for i in range(3)
+        ]
+        for i in range(12):
+            Booking.objects.create(
+                user=cls.customer if i % 2 else other,
+                service=services[i % 3],
+                problem_description='Broken',
+                preferred_date=timezone.localdate() + timedelta(days=i),
+                address='Dar es Salaam',
+                phone='0700000000',
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def get_dashboard(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        return client.get('/api/dashboard/')
+
+    def test_admin_dashboard_queries(self):
+        # user, stats, recent bookings (with services), active services
+        with self.assertNumQueries(4):
+            response = self.get_dashboard(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['recent_bookings']), 5)
+
+    def test_customer_dashboard_queries(self):
+        # user, stats, recent bookings (with services), active services
+        with self.assertNumQueries(4):
+            response = self.get_dashboard(self.customer)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['stats']['total_bookings'], 6)
+
+    def test_customer_dashboard_queries_when_cached(self):
+        self.get_dashboard(self.customer)
+        # user, active services; stats and recent bookings come from the cache
+        with self.assertNumQueries(2):
+            response = self.get_dashboard(self.customer)
+        self.assertEqual(len(response.data['recent_bookings']), 5)
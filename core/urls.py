@@ -3,14 +3,21 @@ from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 
 from .views import (
+    BatchView,
     BookingViewSet,
     ChangePasswordView,
+    DashboardView,
+    HealthView,
     LoginView,
     LogoutView,
+    MetricsView,
+    ProfileDetailView,
+    ProfileListView,
     RegisterView,
     ServiceViewSet,
     UpdateProfileView,
     UserView,
+    booking_events,
 )
 
 service_router = DefaultRouter()
@@ -27,6 +34,13 @@ urlpatterns = [
     path('auth/profile/', UpdateProfileView.as_view(), name='update_profile'),
     path('auth/change-password/', ChangePasswordView.as_view(), name='change_password'),
     path('auth/logout/', LogoutView.as_view(), name='logout'),
+    path('batch/', BatchView.as_view(), name='batch'),
+    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('health/', HealthView.as_view(), name='health'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    path('profiles/', ProfileListView.as_view(), name='profile_list'),
+    path('profiles/<str:name>/', ProfileDetailView.as_view(), name='profile_detail'),
     path('services/', include(service_router.urls)),
+    path('bookings/events/', booking_events, name='booking_events'),
     path('bookings/', include(booking_router.urls)),
 ]
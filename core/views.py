@@ -1,19 +1,40 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth import authenticate, get_user_model
+from django.db import DatabaseError, connection
+from django.http import FileResponse, Http404, HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from rest_framework import generics, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Booking, Service
+from .batch import run_batch
+from .caching import cached_for_user
+from .catalog import ServiceImportError, parse_csv, upsert_services
+from .dispatch import dispatch_bookings
+from .events import authenticate_stream, stream_booking_events
+from .exceptions import Conflict
+from .idempotency import idempotent
+from .middleware import concurrency_limiters
+from .models import Booking, BookingTombstone, Service
+from .profiling import list_profiles, load_profile, profile_path
+from .reports import booking_stats, revenue_report
+from .sync import ExpiredSyncToken, InvalidSyncToken, changes_since
 from .serializers import (
+    BatchSerializer,
+    BookingChangesQuerySerializer,
     BookingCreateSerializer,
     BookingListSerializer,
     BookingSerializer,
     BookingUpdateSerializer,
     ChangePasswordSerializer,
+    DashboardQuerySerializer,
+    DispatchSerializer,
     LoginSerializer,
     RegisterSerializer,
+    RevenueReportQuerySerializer,
+    ServiceImportSerializer,
     ServiceListSerializer,
     ServiceSerializer,
     UpdateProfileSerializer,
@@ -28,11 +49,40 @@ class IsAdminUser(permissions.BasePermission):
         return bool(request.user and request.user.is_authenticated and request.user.is_admin)
 
 
+class HealthView(APIView):
+    """Unauthenticated readiness probe; ``?db=1`` also checks the database connection."""
+    authentication_classes = ()
+    permission_classes = (permissions.AllowAny,)
+
+    def get(self, request):
+        if request.query_params.get('db') not in ('1', 'true'):
+            return Response({'status': 'ok'})
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return Response(
+                {'status': 'unavailable', 'database': 'error'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response({'status': 'ok', 'database': 'ok'})
+
+
+def with_fresh_tokens(data):
+    """Replay hook for registrations: the replayer sent the same password, so issuing tokens is safe."""
+    user = User.objects.filter(pk=data['user']['id']).first()
+    if user is None:
+        return data
+    refresh = RefreshToken.for_user(user)
+    return {**data, 'refresh': str(refresh), 'access': str(refresh.access_token)}
+
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
     serializer_class = RegisterSerializer
 
+    @idempotent(on_replay=with_fresh_tokens)
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -92,6 +142,7 @@ class UpdateProfileView(generics.UpdateAPIView):
 class ChangePasswordView(APIView):
     permission_classes = (permissions.IsAuthenticated,)
 
+    @idempotent
     def post(self, request):
         serializer = ChangePasswordSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
@@ -122,7 +173,7 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return ServiceListSerializer if self.action == 'list' else ServiceSerializer
 
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action in ['create', 'update', 'partial_update', 'destroy', 'bulk_upsert']:
             return [IsAdminUser()]
         return [permissions.IsAuthenticatedOrReadOnly()]
 
@@ -145,6 +196,34 @@ class ServiceViewSet(viewsets.ModelViewSet):
             }
         )
 
+    @action(detail=False, methods=['post'], url_path='bulk-upsert')
+    def bulk_upsert(self, request):
+        """
+        Create or update services matched on name from JSON ``{"services": [...]}``, a text/csv
+        body or a multipart ``file``; returns what changed. ``dry_run`` previews without saving.
+        """
+        if request.content_type.startswith('text/csv'):
+            data = {'services': self._csv_rows(request.body), 'dry_run': request.query_params.get('dry_run', False)}
+        elif 'file' in request.FILES:
+            data = {
+                'services': self._csv_rows(request.FILES['file'].read()),
+                'dry_run': request.data.get('dry_run', request.query_params.get('dry_run', False)),
+            }
+        else:
+            data = request.data
+        serializer = ServiceImportSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return Response(upsert_services(**serializer.validated_data))
+        except ServiceImportError as exc:
+            raise ValidationError({'services': exc.errors})
+
+    def _csv_rows(self, content):
+        try:
+            return parse_csv(content)
+        except ValueError as exc:
+            raise ValidationError({'file': str(exc)})
+
 
 class BookingViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -175,45 +254,53 @@ class BookingViewSet(viewsets.ModelViewSet):
             return queryset
         return Booking.objects.filter(user=user).select_related('user', 'service')
 
+    def list(self, request, *args, **kwargs):
+        if request.user.is_admin:
+            return super().list(request, *args, **kwargs)
+        return Response(
+            cached_for_user(
+                request.user,
+                'list',
+                lambda: self.get_serializer(self.filter_queryset(self.get_queryset()), many=True).data,
+            )
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if request.user.is_admin:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(
+            cached_for_user(
+                request.user,
+                f"retrieve:{kwargs['pk']}",
+                lambda: self.get_serializer(self.get_object()).data,
+            )
+        )
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
     @action(detail=True, methods=['post'])
+    @idempotent
     def cancel(self, request, pk=None):
-        booking = self.get_object()
-        if booking.user != request.user and not request.user.is_admin:
-            return Response({'detail': 'You can only cancel your own bookings'}, status=status.HTTP_403_FORBIDDEN)
-        if booking.status in ['completed', 'cancelled']:
-            return Response(
-                {'detail': 'Cannot cancel a completed or already cancelled booking'},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        booking.status = 'cancelled'
-        booking.save()
+        try:
+            bookings = self.get_queryset().filter(pk=int(pk))
+        except (TypeError, ValueError):
+            raise Http404
+        # get_queryset() limits customers to their own bookings, so the UPDATE enforces ownership too.
+        row = bookings.values_list('pk', 'user_id', 'created_at').first()
+        if row is None:
+            raise Http404
+        if not bookings.transition('cancelled', rows=[row]):
+            raise Conflict('Cannot cancel a completed or already cancelled booking')
         return Response({'status': 'booking cancelled'})
 
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        user = request.user
-        if user.is_admin:
-            completed_with_price = Booking.objects.filter(status='completed').select_related('service')
-            revenue = sum(b.service.price for b in completed_with_price)
-            return Response(
-                {
-                    'total_bookings': Booking.objects.count(),
-                    'pending_bookings': Booking.objects.filter(status='pending').count(),
-                    'completed_bookings': Booking.objects.filter(status='completed').count(),
-                    'cancelled_bookings': Booking.objects.filter(status='cancelled').count(),
-                    'revenue': float(revenue),
-                }
-            )
-        return Response(
-            {
-                'total_bookings': Booking.objects.filter(user=user).count(),
-                'pending_bookings': Booking.objects.filter(user=user, status='pending').count(),
-                'completed_bookings': Booking.objects.filter(user=user, status='completed').count(),
-            }
-        )
+        return Response(booking_stats(request.user))
 
     @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
     def admin(self, request):
@@ -226,3 +313,148 @@ class BookingViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(user__username__icontains=user_filter)
         serializer = BookingSerializer(queryset, many=True)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser], url_path='dispatch')
+    def dispatch_technicians(self, request):
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(dispatch_bookings(**serializer.validated_data))
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAdminUser])
+    def revenue(self, request):
+        query = RevenueReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        return Response(
+            {
+                'period': params['period'],
+                'start': params['start'],
+                'end': params['end'],
+                'results': revenue_report(params['period'], params['start'], params['end']),
+            }
+        )
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        query = BookingChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        tombstones = BookingTombstone.objects.all()
+        if not request.user.is_admin:
+            tombstones = tombstones.filter(user_id=request.user.pk)
+        try:
+            feed = changes_since(
+                self.get_queryset(),
+                tombstones,
+                token=query.validated_data.get('since'),
+                limit=query.validated_data['limit'],
+            )
+        except ExpiredSyncToken as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_410_GONE)
+        except InvalidSyncToken as exc:
+            raise ValidationError({'since': str(exc)})
+        return Response(
+            {
+                'results': self.get_serializer(feed['changed'], many=True).data,
+                'deleted': feed['deleted'],
+                'sync_token': feed['sync_token'],
+                'has_more': feed['has_more'],
+            }
+        )
+
+
+class DashboardView(APIView):
+    """User, booking stats, recent bookings and active services in one response and at most four queries."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request):
+        query = DashboardQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        user = request.user
+        bookings = Booking.objects.all() if user.is_admin else Booking.objects.filter(user=user)
+        count = query.validated_data['recent']
+
+        def recent_bookings():
+            return BookingListSerializer(bookings.select_related('service')[:count], many=True).data
+
+        services = Service.objects.filter(is_active=True)
+        return Response(
+            {
+                'user': UserSerializer(user).data,
+                'stats': booking_stats(user),
+                'recent_bookings': (
+                    recent_bookings() if user.is_admin
+                    else cached_for_user(user, f'recent:{count}', recent_bookings)
+                ),
+                'services': ServiceListSerializer(services, many=True).data,
+            }
+        )
+
+
+class BatchView(APIView):
+    """Run several API requests in one round trip, sharing the caller's authentication."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        responses, rolled_back = run_batch(
+            request,
+            serializer.validated_data['requests'],
+            atomic=serializer.validated_data['atomic'],
+        )
+        return Response({'responses': responses, 'rolled_back': rolled_back})
+
+
+class MetricsView(APIView):
+    """Occupancy of the load-shedding concurrency limits in this process."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({'load_shedding': [limiter.snapshot() for limiter in concurrency_limiters.values()]})
+
+
+class ProfileListView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(list_profiles())
+
+
+class ProfileDetailView(APIView):
+    """Metadata and SQL log of a stored request profile; ``?download=1`` returns the cProfile file."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name):
+        profile = load_profile(name)
+        if profile is None:
+            raise Http404
+        if request.query_params.get('download') in ('1', 'true'):
+            path = profile_path(name, '.prof')
+            if not path.exists():
+                raise Http404
+            return FileResponse(path.open('rb'), as_attachment=True, filename=path.name)
+        return Response(profile)
+
+
+async def booking_events(request):
+    """Server-Sent Events stream of booking status changes for the authenticated user."""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = await sync_to_async(authenticate_stream)(request)
+    if user is None:
+        return JsonResponse(
+            {'detail': 'Authentication credentials were not provided.'},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    response = StreamingHttpResponse(
+        stream_booking_events(user, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,56 @@
+import inspect
+import logging
+import time
+
+from django.db import connection
+from django.urls import get_resolver
+from rest_framework import serializers as drf_serializers
+
+from . import serializers
+
+logger = logging.getLogger(__name__)
+
+
+def warm_database():
+    # Resumes a suspended Neon compute before the first real request needs it. Requests open
+    # their own connections (CONN_MAX_AGE is 0 under ASGI), so this one is closed again.
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    finally:
+        connection.close()
+
+
+def warm_urls():
+    # Populating the reverse dictionary compiles every route regex, core/urls.py included.
+    get_resolver().reverse_dict
+
+
+def warm_serializers():
+    # Building each serializer's fields throws the instance away; what outlasts it are the lazy
+    # imports (validators, field mappings) and the models' _meta field caches it fills. Requests
+    # still build their own fields.
+    for _, serializer_class in inspect.getmembers(serializers, inspect.isclass):
+        if issubclass(serializer_class, drf_serializers.Serializer) and serializer_class.__module__ == serializers.__name__:
+            serializer_class().fields
+
+
+STEPS = (
+    ('database', warm_database),
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+)
+
+
+def run():
+    """Run every warmup step, logging failures instead of raising; returns seconds per step."""
+    timings = {}
+    for name, step in STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception('Warmup step %s failed', name)
+        timings[name] = time.perf_counter() - started
+    logger.info('Warmup finished: %s', ', '.join(f'{name} {seconds:.3f}s' for name, seconds in timings.items()))
+    return timings
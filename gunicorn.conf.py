@@ -0,0 +1,14 @@
+"""
+Gunicorn configuration for PC Maintenance Management System
+"""
+
+import os
+
+
+def post_worker_init(worker):
+    # Wake the database and pay for URL compilation and the lazy imports and model metadata serializers need
+    # before the first request.
+    if os.environ.get('WARMUP_ON_BOOT', 'True') == 'True':
+        from core import warmup
+
+        warmup.run()